@@ -1,16 +1,23 @@
 import requests
-import json
 import os
 import time
+import asyncio
+import ahocorasick
+import dns.asyncresolver
 import dns.resolver
+import ijson
+import numpy as np
+import orjson
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
+from functools import partial
+from itertools import islice
 from urllib.parse import quote
-
-try:
-    from Levenshtein import distance as levenshtein_distance
-    HAS_LEVENSHTEIN = True
-except ImportError:
-    HAS_LEVENSHTEIN = False
+from requests.adapters import HTTPAdapter
+from rapidfuzz import process
+from rapidfuzz.distance import Levenshtein
+from urllib3.util.retry import Retry
 
 # =============================================================================
 # CONFIGURATION
@@ -47,6 +54,11 @@ KEYWORDS = [
     "icloud", "appleid", "google-", "facebook-", "instagram-",
 ]
 
+# High-risk keywords - earn a bonus in the threat score
+HIGH_RISK_KEYWORDS = frozenset([
+    "login", "password", "passwd", "bank", "crypto", "wallet", "verify", "secure",
+])
+
 # Major brands to check for similarity (typosquatting detection)
 BRANDS = [
     "paypal", "amazon", "apple", "google", "microsoft", "facebook",
@@ -69,322 +81,48 @@ FEED_JSON = "data/feed.json"
 SITE_URL = "https://richesec.github.io/phishing-watchdog"
 CHECK_DIR = "check"
 
-# =============================================================================
-# FUNCTIONS
-# =============================================================================
-
-def get_recent_domains():
-    """Fetch domains from CT logs. Uses crt.sh with certspotter as fallback."""
-    now = datetime.now(timezone.utc)
-    past = now - timedelta(hours=12)  # Extended to 12 hours for better coverage
-    
-    # Reduced query terms - fewer but more targeted queries
-    QUERY_TERMS = ["login", "paypal", "secure", "wallet", "verify"]
-    
-    all_domains = set()
-    
-    # Try crt.sh first
-    print("[*] Attempting crt.sh API...")
-    crt_success = False
-    
-    for term in QUERY_TERMS:
-        print(f"[*] Querying crt.sh for '%{term}%'...")
-        
-        # Retry logic with exponential backoff
-        max_retries = 2
-        for attempt in range(max_retries):
-            try:
-                url = f"https://crt.sh/?q=%25{term}%25&output=json"
-                r = requests.get(url, timeout=90, headers={
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                })
-                
-                if r.status_code in [502, 503, 504]:
-                    if attempt < max_retries - 1:
-                        wait_time = (attempt + 1) * 10
-                        print(f"    [!] Status {r.status_code}, retry in {wait_time}s...")
-                        time.sleep(wait_time)
-                        continue
-                    else:
-                        print(f"    [!] Status {r.status_code}, skipping")
-                        break
-                    
-                if r.status_code != 200:
-                    print(f"    [!] Status {r.status_code}, skipping")
-                    break
-                    
-                try:
-                    results = r.json()
-                except:
-                    print(f"    [!] Invalid JSON, skipping")
-                    break
-                
-                count = 0
-                for c in results[:500]:  # Limit results per query
-                    not_before = c.get("not_before", "")
-                    if not_before:
-                        try:
-                            cert_date = datetime.fromisoformat(not_before.replace("T", " ").split(".")[0])
-                            if cert_date.replace(tzinfo=timezone.utc) < past:
-                                continue
-                        except:
-                            pass
-                    
-                    name = c.get("common_name") or ""
-                    if name and "." in name and not name.startswith("*"):
-                        all_domains.add(name.lower().strip())
-                        count += 1
-
-                    san = c.get("name_value") or ""
-                    for d in san.split("\n"):
-                        d = d.strip().lower()
-                        if "." in d and not d.startswith("*"):
-                            all_domains.add(d)
-                            count += 1
-                
-                if count > 0:
-                    crt_success = True
-                print(f"    [+] Found {count} recent domains")
-                break
-                
-            except requests.exceptions.Timeout:
-                if attempt < max_retries - 1:
-                    print(f"    [!] Timeout, retrying...")
-                    time.sleep(10)
-                else:
-                    print(f"    [!] Timeout, skipping")
-            except Exception as e:
-                print(f"    [!] Error: {e}")
-                break
-        
-        # Longer delay between queries
-        time.sleep(5)
-    
-    # If crt.sh failed completely, try certspotter API
-    if not crt_success and len(all_domains) == 0:
-        print("\n[*] crt.sh unavailable, trying certspotter API...")
-        for term in ["paypal", "amazon", "google"]:
-            try:
-                url = f"https://api.certspotter.com/v1/issuances?domain={term}.com&include_subdomains=true&expand=dns_names"
-                r = requests.get(url, timeout=30)
-                if r.status_code == 200:
-                    results = r.json()
-                    for cert in results[:100]:
-                        for name in cert.get("dns_names", []):
-                            if not name.startswith("*"):
-                                all_domains.add(name.lower())
-                    print(f"    [+] Got {len(results)} certs from certspotter")
-                time.sleep(2)
-            except Exception as e:
-                print(f"    [!] Certspotter error: {e}")
-
-    print(f"\n[+] Total unique domains: {len(all_domains)}")
-    return list(all_domains)
-
-
-def get_domain_base(domain):
-    """Extract base domain name without TLD for comparison."""
-    parts = domain.split(".")
-    if len(parts) >= 2:
-        # Get the main part (before TLD)
-        return parts[-2]
-    return domain
-
-
-def calculate_brand_similarity(domain):
-    """Check if domain is similar to any known brand (typosquatting detection)."""
-    if not HAS_LEVENSHTEIN:
-        return None, 0
-    
-    domain_base = get_domain_base(domain)
-    
-    best_match = None
-    best_score = 0
-    
-    for brand in BRANDS:
-        # Check if brand is substring
-        if brand in domain_base:
-            return brand, 1.0
-        
-        # Calculate similarity using Levenshtein distance
-        max_len = max(len(domain_base), len(brand))
-        if max_len == 0:
-            continue
-            
-        dist = levenshtein_distance(domain_base, brand)
-        similarity = 1 - (dist / max_len)
-        
-        if similarity > best_score:
-            best_score = similarity
-            best_match = brand
-    
-    return best_match, best_score
-
-
-def is_suspicious(domain):
-    """Check if domain matches keywords or looks like a brand typo."""
-    # Check for keyword matches
-    matched_keywords = []
-    for k in KEYWORDS:
-        if k in domain:
-            matched_keywords.append(k)
-    
-    # Check for brand similarity
-    brand_match, similarity = calculate_brand_similarity(domain)
-    brand_alert = brand_match and similarity >= BRAND_SIMILARITY_THRESHOLD
-    
-    if matched_keywords or brand_alert:
-        return {
-            "suspicious": True,
-            "keywords": matched_keywords,
-            "brand_match": brand_match if brand_alert else None,
-            "brand_similarity": round(similarity, 2) if brand_alert else None
-        }
-    
-    return {"suspicious": False}
-
-
-def has_mx(domain):
-    """Check if domain has MX records (can receive email)."""
-    try:
-        dns.resolver.resolve(domain, "MX")
-        return True
-    except:
-        return False
-
-
-def calculate_threat_score(entry):
-    """
-    Calculate a threat score (0-100) for a domain.
-    
-    Scoring breakdown:
-    - MX Record present: +25 points (can receive phishing emails)
-    - Brand similarity: up to +35 points (based on similarity %)
-    - Keywords: +5 points each (max +25 points)
-    - High-risk keywords: +15 bonus (login, password, bank, crypto)
-    """
-    score = 0
-    
-    # MX Record - Can receive emails (major red flag)
-    if entry.get("mx"):
-        score += 25
-    
-    # Brand similarity scoring
-    similarity = entry.get("brand_similarity", 0) or 0
-    if similarity > 0:
-        # Scale: 80% match = 28 points, 100% match = 35 points
-        score += int(similarity * 35)
-    
-    # Keyword scoring
-    keywords = entry.get("keywords", [])
-    keyword_score = min(len(keywords) * 5, 25)  # Cap at 25
-    score += keyword_score
-    
-    # High-risk keyword bonus
-    high_risk = ["login", "password", "passwd", "bank", "crypto", "wallet", "verify", "secure"]
-    if any(k in high_risk for k in keywords):
-        score += 15
-    
-    # Cap at 100
-    return min(score, 100)
-
-
-def get_threat_level(score):
-    """Convert numeric score to threat level label."""
-    if score >= 75:
-        return "CRITICAL"
-    elif score >= 50:
-        return "HIGH"
-    elif score >= 25:
-        return "MEDIUM"
-    else:
-        return "LOW"
-
-
-def has_a_record(domain):
-    """Check if domain resolves to an IP."""
-    try:
-        dns.resolver.resolve(domain, "A")
-        return True
-    except:
-        return False
-
+# Max parallel crt.sh queries (crt.sh rate-limits aggressive clients)
+CRT_MAX_WORKERS = 4
 
-def load_existing():
-    """Load existing domain data."""
-    if not os.path.exists(OUTPUT_JSON):
-        return []
-    with open(OUTPUT_JSON, "r") as f:
-        return json.load(f)
+# Shared HTTP session - reuses TCP/TLS connections across queries.
+# Transient 5xx/timeouts are retried with backoff by the adapter.
+SESSION = requests.Session()
+SESSION.headers["User-Agent"] = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=16,
+    max_retries=Retry(total=2, backoff_factor=0.5,
+                      status_forcelist=[502, 503, 504], raise_on_status=False),
+))
 
+# Max in-flight DNS queries (avoid overwhelming the recursive resolver)
+DNS_MAX_INFLIGHT = 64
 
-def save_json(data):
-    """Save domain data to JSON."""
-    os.makedirs(os.path.dirname(OUTPUT_JSON), exist_ok=True)
-    with open(OUTPUT_JSON, "w") as f:
-        json.dump(data, f, indent=2)
+# Per-nameserver timeout and total time per lookup, in seconds
+DNS_TIMEOUT = 1.0
+DNS_LIFETIME = 3.0
 
+# Answers shared by all lookups in this process
+DNS_CACHE = dns.resolver.LRUCache(10000)
 
-def save_feed(data):
-    """Generate JSON feed with all domains."""
-    items = []
-    for d in reversed(data):  # Include all domains, not just last 50
-        url = f"{SITE_URL}/check/{quote(d['domain'])}.html"
-        threat_score = d.get("threat_score", calculate_threat_score(d))
-        items.append({
-            "domain": d["domain"],
-            "link": url,
-            "date": d["date"],
-            "mx": d.get("mx", False),
-            "keywords": d.get("keywords", []),
-            "brand_match": d.get("brand_match"),
-            "brand_similarity": d.get("brand_similarity"),
-            "threat_score": threat_score,
-            "threat_level": get_threat_level(threat_score)
-        })
-    
-    os.makedirs(os.path.dirname(FEED_JSON), exist_ok=True)
-    with open(FEED_JSON, "w") as f:
-        json.dump(items, f, indent=2)
-
+# =============================================================================
+# PAGE TEMPLATE
+# =============================================================================
 
-def generate_page(d):
-    """Generate warning page for a suspicious domain."""
-    os.makedirs(CHECK_DIR, exist_ok=True)
-    
-    # Sanitize filename
-    safe_name = d['domain'].replace('/', '_').replace('\\', '_')
-    path = f"{CHECK_DIR}/{safe_name}.html"
-    
-    # Calculate threat score if not present
-    threat_score = d.get("threat_score", calculate_threat_score(d))
-    threat_level = d.get("threat_level", get_threat_level(threat_score))
-    
-    # Threat level colors
-    threat_colors = {
-        "CRITICAL": ("#ff1744", "#ff1744"),
-        "HIGH": ("#ff4757", "#ff6b7a"),
-        "MEDIUM": ("#ffa502", "#ffb733"),
-        "LOW": ("#00ff88", "#33ff9f")
-    }
-    threat_color = threat_colors.get(threat_level, ("#ffa502", "#ffb733"))
-    
-    keywords_html = ""
-    if d.get("keywords"):
-        keywords_html = f"""<p><strong>Matched Keywords:</strong> {', '.join(d['keywords'])}</p>"""
-    
-    brand_html = ""
-    if d.get("brand_match"):
-        similarity = d.get('brand_similarity', 0) or 0
-        brand_html = f"""
-<p><strong>⚠️ Brand Impersonation:</strong> Targeting <code>{d['brand_match']}</code></p>
-<p><strong>Similarity Score:</strong> <span style="color: {threat_color[0]}; font-weight: bold;">{similarity * 100:.0f}%</span> match (Levenshtein distance)</p>
-"""
-    
-    html = f"""<!DOCTYPE html>
+# Threat level colors (primary, light)
+THREAT_COLORS = {
+    "CRITICAL": ("#ff1744", "#ff1744"),
+    "HIGH": ("#ff4757", "#ff6b7a"),
+    "MEDIUM": ("#ffa502", "#ffb733"),
+    "LOW": ("#00ff88", "#33ff9f")
+}
+DEFAULT_THREAT_COLOR = ("#ffa502", "#ffb733")
+
+# Warning page, filled in by generate_page() via str.format
+PAGE_TEMPLATE = """<!DOCTYPE html>
 <html lang="en">
 <head>
-<title>⚠️ {d['domain']} - Threat Score {threat_score}/100</title>
+<title>⚠️ {domain} - Threat Score {threat_score}/100</title>
 <meta charset="utf-8">
 <meta name="viewport" content="width=device-width, initial-scale=1">
 <link rel="preconnect" href="https://fonts.googleapis.com">
@@ -398,7 +136,7 @@ def generate_page(d):
     --text-secondary: #8b8b9e;
     --accent: #00ff88;
     --danger: #ff4757;
-    --threat-color: {threat_color[0]};
+    --threat-color: {color};
 }}
 * {{ margin: 0; padding: 0; box-sizing: border-box; }}
 body {{
@@ -413,8 +151,8 @@ body {{
 .threat-header {{
     text-align: center;
     padding: 2rem;
-    background: linear-gradient(135deg, {threat_color[0]}22, {threat_color[1]}11);
-    border: 1px solid {threat_color[0]}44;
+    background: linear-gradient(135deg, {color}22, {color_light}11);
+    border: 1px solid {color}44;
     border-radius: 16px;
     margin-bottom: 2rem;
 }}
@@ -422,7 +160,7 @@ body {{
     display: inline-flex;
     align-items: center;
     gap: 0.5rem;
-    background: {threat_color[0]};
+    background: {color};
     color: #000;
     padding: 0.5rem 1rem;
     border-radius: 50px;
@@ -434,7 +172,7 @@ body {{
     font-family: 'JetBrains Mono', monospace;
     font-size: 4rem;
     font-weight: 700;
-    color: {threat_color[0]};
+    color: {color};
     line-height: 1;
 }}
 .threat-score span {{
@@ -519,26 +257,26 @@ body {{
 <div class="threat-header">
     <div class="threat-badge">⚡ {threat_level} THREAT</div>
     <div class="threat-score">{threat_score}<span>/100</span></div>
-    <div class="domain-name">🔗 {d['domain']}</div>
+    <div class="domain-name">🔗 {domain}</div>
 </div>
 
 <div class="card">
     <h2>📊 Threat Analysis</h2>
     <div class="score-breakdown">
         <div class="score-item">
-            <div class="value" style="color: {'var(--danger)' if d.get('mx') else 'var(--accent)'}">{'YES' if d.get('mx') else 'NO'}</div>
+            <div class="value" style="color: {mx_color}">{mx_label}</div>
             <div class="label">MX Record</div>
         </div>
         <div class="score-item">
-            <div class="value" style="color: var(--threat-color)">{d.get('brand_similarity', 0) * 100 if d.get('brand_similarity') else 0:.0f}%</div>
+            <div class="value" style="color: var(--threat-color)">{brand_pct:.0f}%</div>
             <div class="label">Brand Match</div>
         </div>
         <div class="score-item">
-            <div class="value">{len(d.get('keywords', []))}</div>
+            <div class="value">{keyword_count}</div>
             <div class="label">Keywords</div>
         </div>
         <div class="score-item">
-            <div class="value">{'YES' if d.get('has_ip') else '?'}</div>
+            <div class="value">{ip_label}</div>
             <div class="label">Resolves</div>
         </div>
     </div>
@@ -546,8 +284,8 @@ body {{
 
 <div class="card">
     <h2>🔍 Detection Details</h2>
-    <p><strong>Detected:</strong> {d['date']}</p>
-    <p><strong>MX Record:</strong> {'<span class="mx-warning">Yes ⚠️ Can receive phishing emails</span>' if d.get('mx') else 'No'}</p>
+    <p><strong>Detected:</strong> {date}</p>
+    <p><strong>MX Record:</strong> {mx_detail}</p>
     {keywords_html}
     {brand_html}
 </div>
@@ -581,8 +319,397 @@ body {{
 </body>
 </html>
 """
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(html)
+
+# =============================================================================
+# FUNCTIONS
+# =============================================================================
+
+def _build_automaton(words):
+    """Build an Aho-Corasick automaton matching all words in one pass.
+    Each match yields (index in words, word)."""
+    automaton = ahocorasick.Automaton()
+    for i, w in enumerate(words):
+        automaton.add_word(w, (i, w))
+    automaton.make_automaton()
+    return automaton
+
+
+# Aho-Corasick reports overlapping keywords ("bank" and "banking", "recover"
+# and "recovery") in one scan, which a single alternation regex would not
+KEYWORD_AUTOMATON = _build_automaton(KEYWORDS)
+BRAND_AUTOMATON = _build_automaton(BRANDS)
+
+
+def _fetch_term(term, past_iso):
+    """Query crt.sh for a single term and return the set of recent domains."""
+    domains = set()
+    print(f"[*] Querying crt.sh for '%{term}%'...")
+
+    try:
+        url = f"https://crt.sh/?q=%25{term}%25&output=json"
+        with SESSION.get(url, timeout=90, stream=True) as r:
+            if r.status_code != 200:
+                print(f"    [!] '{term}': Status {r.status_code}, skipping")
+                return domains
+
+            # Parse rows as they arrive instead of loading the whole response;
+            # the connection is closed once the row limit is reached
+            r.raw.decode_content = True
+            rows = islice(ijson.items(r.raw, "item"), 500)  # Limit results per query
+            try:
+                for c in rows:
+                    # crt.sh dates are UTC ISO-8601, which sort correctly as strings
+                    not_before = c.get("not_before")
+                    if not_before and not_before[:19] < past_iso:
+                        continue
+
+                    name = c.get("common_name") or ""
+                    if name and "." in name and not name.startswith("*"):
+                        domains.add(name.lower().strip())
+
+                    san = c.get("name_value") or ""
+                    san_names = (n.strip().lower() for n in san.split("\n"))
+                    domains.update(d for d in san_names if "." in d and not d.startswith("*"))
+            except ijson.JSONError:
+                print(f"    [!] '{term}': Invalid JSON, keeping rows parsed so far")
+
+        print(f"    [+] '{term}': Found {len(domains)} recent domains")
+
+    except requests.exceptions.Timeout:
+        print(f"    [!] '{term}': Timeout, skipping")
+    except Exception as e:
+        print(f"    [!] '{term}': Error: {e}")
+
+    return domains
+
+
+def get_recent_domains():
+    """Fetch domains from CT logs. Uses crt.sh with certspotter as fallback."""
+    now = datetime.now(timezone.utc)
+    past = now - timedelta(hours=12)  # Extended to 12 hours for better coverage
+    past_iso = past.strftime("%Y-%m-%dT%H:%M:%S")
+    
+    # Reduced query terms - fewer but more targeted queries
+    QUERY_TERMS = ["login", "paypal", "secure", "wallet", "verify"]
+    
+    all_domains = set()
+    
+    # Try crt.sh first - all terms in parallel over the shared session
+    print("[*] Attempting crt.sh API...")
+    with ThreadPoolExecutor(max_workers=CRT_MAX_WORKERS) as ex:
+        futures = [ex.submit(_fetch_term, term, past_iso) for term in QUERY_TERMS]
+        for f in as_completed(futures):
+            all_domains |= f.result()
+    
+    # If crt.sh failed completely, try certspotter API
+    if not all_domains:
+        print("\n[*] crt.sh unavailable, trying certspotter API...")
+        for term in ["paypal", "amazon", "google"]:
+            try:
+                url = f"https://api.certspotter.com/v1/issuances?domain={term}.com&include_subdomains=true&expand=dns_names"
+                r = SESSION.get(url, timeout=30)
+                if r.status_code == 200:
+                    results = r.json()
+                    for cert in results[:100]:
+                        for name in cert.get("dns_names", []):
+                            if not name.startswith("*"):
+                                all_domains.add(name.lower())
+                    print(f"    [+] Got {len(results)} certs from certspotter")
+                time.sleep(2)
+            except Exception as e:
+                print(f"    [!] Certspotter error: {e}")
+
+    print(f"\n[+] Total unique domains: {len(all_domains)}")
+    return list(all_domains)
+
+
+def get_domain_base(domain):
+    """Extract base domain name without TLD for comparison."""
+    head, sep, _ = domain.rpartition(".")
+    if not sep:
+        return domain
+    # Get the main part (before TLD)
+    return head.rpartition(".")[2]
+
+
+def _brands_within_reach(length):
+    """
+    Brands (in BRANDS order) that a base of this length can reach the
+    similarity threshold against. Edit distance is at least the length
+    difference, so similarity is at most 1 - |len diff| / max_len.
+    """
+    return [
+        b for b in BRANDS
+        if 1 - abs(length - len(b)) / max(length, len(b)) >= BRAND_SIMILARITY_THRESHOLD
+    ]
+
+
+# Base length -> candidate brands, only for lengths with any candidate
+BRANDS_BY_LENGTH = {
+    n: brands
+    for n in range(1, int(max(map(len, BRANDS)) / BRAND_SIMILARITY_THRESHOLD) + 2)
+    if (brands := _brands_within_reach(n))
+}
+
+# rapidfuzz applies normalized cutoffs with float rounding and drops pairs
+# sitting exactly on the threshold (1 edit in 5 chars = 0.8), so the kernel
+# cutoff gets a little slack and the exact threshold is checked afterwards
+_KERNEL_CUTOFF_SLACK = 1e-6
+
+
+def calculate_brand_similarities(domain_bases):
+    """
+    Find the closest brand for each domain base (typosquatting detection).
+    
+    Returns two lists aligned with domain_bases: the best matching brand
+    and its similarity score (0-1), or None and 0 when no brand reaches
+    BRAND_SIMILARITY_THRESHOLD.
+    """
+    # CT results repeat the same base across many hostnames
+    # (e.g. *.corp.amazon.com), so each distinct base is scored once
+    best = {}
+    
+    # Brand as substring is a full match - no distance needed. The rest are
+    # bucketed by length; bases too short or too long to be within
+    # threshold of any brand are skipped.
+    by_length = defaultdict(list)
+    for base in dict.fromkeys(domain_bases):
+        substring = min((v for _, v in BRAND_AUTOMATON.iter(base)), default=None)
+        if substring:
+            best[base] = (substring[1], 1.0)
+        elif len(base) in BRANDS_BY_LENGTH:
+            by_length[len(base)].append(base)
+    
+    for length, bases in by_length.items():
+        candidates = BRANDS_BY_LENGTH[length]
+        # Normalized Levenshtein similarity (1 - distance / max_len) for
+        # the bucket x candidate brands matrix in one native call. Pairs
+        # below the cutoff are abandoned early and scored 0.
+        sim = process.cdist(
+            bases, candidates,
+            scorer=Levenshtein.normalized_similarity,
+            score_cutoff=BRAND_SIMILARITY_THRESHOLD - _KERNEL_CUTOFF_SLACK,
+            dtype=np.float64,
+            workers=-1,
+        )
+        best_idx = sim.argmax(axis=1)
+        best_score = sim.max(axis=1)
+        for base, j, score in zip(bases, best_idx.tolist(), best_score.tolist()):
+            if score >= BRAND_SIMILARITY_THRESHOLD:
+                best[base] = (candidates[j], score)
+    
+    no_match = (None, 0)
+    brand_matches = [best.get(b, no_match)[0] for b in domain_bases]
+    scores = [best.get(b, no_match)[1] for b in domain_bases]
+    return brand_matches, scores
+
+
+def classify_domains(domains):
+    """
+    Check which domains match keywords or look like a brand typo.
+    
+    Brand similarity is scored for the whole batch first, then each domain
+    is classified in a single pass. Returns one item per domain, in the
+    same order: the detection fields (keywords, brand_match,
+    brand_similarity) for suspicious domains, None otherwise.
+    """
+    brand_matches, similarities = calculate_brand_similarities(
+        [get_domain_base(d) for d in domains])
+    
+    scan = KEYWORD_AUTOMATON.iter
+    threshold = BRAND_SIMILARITY_THRESHOLD
+    
+    results = []
+    for domain, brand_match, similarity in zip(domains, brand_matches, similarities):
+        # Keyword matches in KEYWORDS order
+        keywords = [k for _, k in sorted({v for _, v in scan(domain)})]
+        brand_alert = brand_match and similarity >= threshold
+        
+        if keywords or brand_alert:
+            results.append({
+                "keywords": keywords,
+                "brand_match": brand_match if brand_alert else None,
+                "brand_similarity": round(similarity, 2) if brand_alert else None
+            })
+        else:
+            results.append(None)
+    
+    return results
+
+
+def calculate_threat_score(entry):
+    """
+    Calculate a threat score (0-100) for a domain.
+    
+    Scoring breakdown:
+    - MX Record present: +25 points (can receive phishing emails)
+    - Brand similarity: up to +35 points (based on similarity %)
+    - Keywords: +5 points each (max +25 points)
+    - High-risk keywords: +15 bonus (login, password, bank, crypto)
+    """
+    score = 0
+    
+    # MX Record - Can receive emails (major red flag)
+    if entry.get("mx"):
+        score += 25
+    
+    # Brand similarity scoring
+    similarity = entry.get("brand_similarity", 0) or 0
+    if similarity > 0:
+        # Scale: 80% match = 28 points, 100% match = 35 points
+        score += int(similarity * 35)
+    
+    # Keyword scoring
+    keywords = entry.get("keywords", [])
+    keyword_score = min(len(keywords) * 5, 25)  # Cap at 25
+    score += keyword_score
+    
+    # High-risk keyword bonus
+    if not HIGH_RISK_KEYWORDS.isdisjoint(keywords):
+        score += 15
+    
+    # Cap at 100
+    return min(score, 100)
+
+
+def get_threat_level(score):
+    """Convert numeric score to threat level label."""
+    if score >= 75:
+        return "CRITICAL"
+    elif score >= 50:
+        return "HIGH"
+    elif score >= 25:
+        return "MEDIUM"
+    else:
+        return "LOW"
+
+
+async def _has_record(resolver, sem, domain, rdtype):
+    """Check if domain has at least one record of the given type."""
+    async with sem:
+        try:
+            await resolver.resolve(domain, rdtype)
+            return True
+        except Exception:
+            return False
+
+
+async def resolve_all(domains):
+    """
+    Resolve MX and A records for all domains concurrently.
+    
+    Returns two dicts mapping domain -> bool:
+    - mx_map: domain has MX records (can receive email)
+    - a_map: domain resolves to an IP
+    """
+    try:
+        resolver = dns.asyncresolver.Resolver(configure=True)
+    except Exception as e:
+        # No usable resolver config - every lookup counts as no record
+        print(f"[!] DNS resolver unavailable ({e}), skipping MX/A checks")
+        return dict.fromkeys(domains, False), dict.fromkeys(domains, False)
+    resolver.timeout = DNS_TIMEOUT
+    resolver.lifetime = DNS_LIFETIME
+    resolver.cache = DNS_CACHE
+    sem = asyncio.Semaphore(DNS_MAX_INFLIGHT)
+    
+    mx_results, a_results = await asyncio.gather(
+        asyncio.gather(*(_has_record(resolver, sem, d, "MX") for d in domains)),
+        asyncio.gather(*(_has_record(resolver, sem, d, "A") for d in domains)),
+    )
+    return dict(zip(domains, mx_results)), dict(zip(domains, a_results))
+
+
+def load_existing():
+    """Load existing domain data."""
+    if not os.path.exists(OUTPUT_JSON):
+        return []
+    with open(OUTPUT_JSON, "rb") as f:
+        return orjson.loads(f.read())
+
+
+def save_json(data):
+    """Save domain data to JSON."""
+    os.makedirs(os.path.dirname(OUTPUT_JSON), exist_ok=True)
+    with open(OUTPUT_JSON, "wb") as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+
+
+def save_feed(data):
+    """Generate JSON feed with all domains."""
+    items = []
+    for d in reversed(data):  # Include all domains, not just last 50
+        url = f"{SITE_URL}/check/{quote(d['domain'])}.html"
+        threat_score = d.get("threat_score", calculate_threat_score(d))
+        items.append({
+            "domain": d["domain"],
+            "link": url,
+            "date": d["date"],
+            "mx": d.get("mx", False),
+            "keywords": d.get("keywords", []),
+            "brand_match": d.get("brand_match"),
+            "brand_similarity": d.get("brand_similarity"),
+            "threat_score": threat_score,
+            "threat_level": get_threat_level(threat_score)
+        })
+    
+    os.makedirs(os.path.dirname(FEED_JSON), exist_ok=True)
+    with open(FEED_JSON, "wb") as f:
+        f.write(orjson.dumps(items, option=orjson.OPT_INDENT_2))
+
+
+def generate_page(d, dir_fd=None):
+    """
+    Generate warning page for a suspicious domain.
+    
+    If dir_fd is an open descriptor for CHECK_DIR, the page is created
+    relative to it instead of resolving the CHECK_DIR path again.
+    """
+    # Sanitize filename
+    safe_name = d['domain'].replace('/', '_').replace('\\', '_')
+    if dir_fd is None:
+        path = f"{CHECK_DIR}/{safe_name}.html"
+    else:
+        path = f"{safe_name}.html"
+    # Pages are plain 0644 files, like open() would create them
+    opener = lambda p, flags: os.open(p, flags, 0o644, dir_fd=dir_fd)
+    
+    # Calculate threat score if not present
+    threat_score = d.get("threat_score", calculate_threat_score(d))
+    threat_level = d.get("threat_level", get_threat_level(threat_score))
+    
+    threat_color = THREAT_COLORS.get(threat_level, DEFAULT_THREAT_COLOR)
+    
+    keywords_html = ""
+    if d.get("keywords"):
+        keywords_html = f"""<p><strong>Matched Keywords:</strong> {', '.join(d['keywords'])}</p>"""
+    
+    brand_html = ""
+    if d.get("brand_match"):
+        similarity = d.get('brand_similarity', 0) or 0
+        brand_html = f"""
+<p><strong>⚠️ Brand Impersonation:</strong> Targeting <code>{d['brand_match']}</code></p>
+<p><strong>Similarity Score:</strong> <span style="color: {threat_color[0]}; font-weight: bold;">{similarity * 100:.0f}%</span> match (Levenshtein distance)</p>
+"""
+    
+    html = PAGE_TEMPLATE.format(
+        domain=d['domain'],
+        date=d['date'],
+        threat_score=threat_score,
+        threat_level=threat_level,
+        color=threat_color[0],
+        color_light=threat_color[1],
+        mx_color='var(--danger)' if d.get('mx') else 'var(--accent)',
+        mx_label='YES' if d.get('mx') else 'NO',
+        mx_detail='<span class="mx-warning">Yes ⚠️ Can receive phishing emails</span>' if d.get('mx') else 'No',
+        brand_pct=d.get('brand_similarity', 0) * 100 if d.get('brand_similarity') else 0,
+        keyword_count=len(d.get('keywords', [])),
+        ip_label='YES' if d.get('has_ip') else '?',
+        keywords_html=keywords_html,
+        brand_html=brand_html,
+    )
+    with open(path, "wb", opener=opener) as f:
+        f.write(html.encode("utf-8"))
 
 
 def main(test_mode=False):
@@ -614,42 +741,65 @@ def main(test_mode=False):
     existing = load_existing()
     existing_domains = {e["domain"] for e in existing}
     
-    added_count = 0
+    # Skip already processed domains
+    candidates = [d for d in new_domains if d not in existing_domains]
     
-    for d in new_domains:
-        # Skip already processed domains
-        if d in existing_domains:
-            continue
-        
-        result = is_suspicious(d)
-        if not result["suspicious"]:
+    # Classify first, then resolve DNS for all suspicious domains in one batch
+    suspicious = []
+    for d, detection in zip(candidates, classify_domains(candidates)):
+        if detection is None:
             print(f"[.] Clean: {d}")
             continue
-
+        suspicious.append((d, detection))
+    
+    if test_mode:
+        mx_map = {d: False for d, _ in suspicious}
+        a_map = {d: True for d, _ in suspicious}
+    else:
+        mx_map, a_map = asyncio.run(resolve_all([d for d, _ in suspicious]))
+    
+    new_entries = []
+    for d, detection in suspicious:
+        keywords = detection["keywords"]
+        brand_match = detection["brand_match"]
+        
         print(f"[!] Suspicious: {d}")
-        if result.get("keywords"):
-            print(f"    Keywords: {', '.join(result['keywords'])}")
-        if result.get("brand_match"):
-            print(f"    Brand Match: {result['brand_match']} ({result['brand_similarity']*100:.0f}%)")
+        if keywords:
+            print(f"    Keywords: {', '.join(keywords)}")
+        if brand_match:
+            print(f"    Brand Match: {brand_match} ({detection['brand_similarity']*100:.0f}%)")
 
         entry = {
             "domain": d,
-            "mx": has_mx(d) if not test_mode else False,
-            "has_ip": has_a_record(d) if not test_mode else True,
-            "keywords": result.get("keywords", []),
-            "brand_match": result.get("brand_match"),
-            "brand_similarity": result.get("brand_similarity"),
+            "mx": mx_map[d],
+            "has_ip": a_map[d],
+            **detection,
             "date": datetime.now(timezone.utc).isoformat()
         }
         
         # Calculate threat score
-        entry["threat_score"] = calculate_threat_score(entry)
-        entry["threat_level"] = get_threat_level(entry["threat_score"])
-        print(f"    Threat Score: {entry['threat_score']}/100 ({entry['threat_level']})")
+        threat_score = calculate_threat_score(entry)
+        entry["threat_score"] = threat_score
+        entry["threat_level"] = get_threat_level(threat_score)
+        print(f"    Threat Score: {threat_score}/100 ({entry['threat_level']})")
+
+        new_entries.append(entry)
 
-        existing.append(entry)
-        generate_page(entry)
-        added_count += 1
+    # Pages are independent - write them in parallel, all relative to one
+    # open handle on CHECK_DIR where the platform supports it
+    os.makedirs(CHECK_DIR, exist_ok=True)
+    dir_fd = None
+    if os.open in os.supports_dir_fd:
+        dir_fd = os.open(CHECK_DIR, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        with ThreadPoolExecutor() as ex:
+            list(ex.map(partial(generate_page, dir_fd=dir_fd), new_entries))
+    finally:
+        if dir_fd is not None:
+            os.close(dir_fd)
+    
+    existing.extend(new_entries)
+    added_count = len(new_entries)
 
     # Keep latest 1000
     existing = existing[-1000:]